@@ -1,35 +1,59 @@
 import datetime as dt
+import functools
 import time
 import logging
-import random
+
+from collections import namedtuple
+
+import numpy as np
+from numba import njit
+from scipy.special import ndtr
 
 from optibook.synchronous_client import Exchange
 
 
-from math import floor, ceil
-from black_scholes import call_value, put_value, call_delta, put_delta, call_vega, put_vega
+from math import floor, ceil, exp, fabs, isnan, log, nan, sqrt
 from libs import calculate_current_time_to_date
 
 exchange = Exchange()
 exchange.connect()
 
+# Give the root logger a console handler, so that lowering the level below lets the DEBUG diagnostics through
+logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s')
 logging.getLogger('client').setLevel('ERROR')
 
-force_delta_increase = False
-force_delta_decrease = False
+# Diagnostics are logged at DEBUG so the trade loop does not pay for console output; lower the level to see them
+logger = logging.getLogger(__name__)
+logger.setLevel('WARNING')
+
+# Bits of FORCE_FLAGS, derived from the stock position at the end of every trade loop iteration
+FORCE_DELTA_INCREASE = 1
+FORCE_DELTA_DECREASE = 2
+FORCE_FLAGS = 0
+
+# Earliest time.monotonic() at which the next paced exchange update may start, see pace()
+_next_allowed = 0.0
+
+# Per-option delta lookup tables over stock values in [0, DELTA_LUT_MAX_STOCK], rebuilt every DELTA_LUT_REFRESH seconds
+DELTA_LUT_SIZE = 256
+DELTA_LUT_MAX_STOCK = 200.0
+DELTA_LUT_REFRESH = 60.0
+_delta_lut = None
+_delta_lut_built_at = None
+
+# Orders we inserted and have not pulled yet, per option id: {order_id: QuotedOrder}. An option without an entry (at
+# start-up, or after a failed insert) is looked up on the exchange with get_outstanding_orders instead.
+QuotedOrder = namedtuple('QuotedOrder', ['side', 'volume', 'price'])
+outstanding = {}
 
 
 def limit_maker_man(strike, stock_value): 
   maxx = 100
-  if strike <= stock_value:
-    ratio = strike / stock_value
-  else:
-    ratio = stock_value / strike
-  return round(maxx * ratio,0)
+  # Ratio of the smaller to the larger of the two, without branching on which one that is
+  return round(maxx * min(strike, stock_value) / max(strike, stock_value))
   
 
-def trade_would_breach_position_limit(instrument_id, volume, side, position_limit = 100):
-    positions = exchange.get_positions()
+def trade_would_breach_position_limit(instrument_id, volume, side, positions, position_limit = 100):
     position_instrument = positions[instrument_id]
 
     if side == 'bid':
@@ -39,89 +63,230 @@ def trade_would_breach_position_limit(instrument_id, volume, side, position_limi
     else:
         raise Exception(f'''Invalid side provided: {side}, expecting 'bid' or 'ask'.''')
 
-def round_down_to_tick(price, tick_size):
+# Abramowitz & Stegun polynomial coefficients for the cumulative normal distribution
+RSQRT2PI = 0.39894228040143267793994605993438
+CND_A1 = 0.31938153
+CND_A2 = -0.356563782
+CND_A3 = 1.781477937
+CND_A4 = -1.821255978
+CND_A5 = 1.330274429
+
+
+@njit(cache=True, fastmath=True)
+def _cnd_from_pdf(d, pdf):
+    # Cumulative normal at <d>, given the standard normal density <pdf> at <d>
+    k = 1.0 / (1.0 + 0.2316419 * fabs(d))
+    ret_val = pdf * (k * (CND_A1 + k * (CND_A2 + k * (CND_A3 + k * (CND_A4 + k * CND_A5)))))
+    if d > 0:
+        ret_val = 1.0 - ret_val
+    return ret_val
+
+
+@njit(cache=True, fastmath=True)
+def _cnd(d):
+    return _cnd_from_pdf(d, RSQRT2PI * exp(-0.5 * d * d))
+
+
+@njit(cache=True, fastmath=True)
+def price_value_delta_vega(S, K, T, r, sigma, is_call):
+    """
+    Black & Scholes value, delta and vega of a single option, compiled to native code by Numba. sqrt(T), sigma*sqrt(T),
+    d1 and the normal density and distribution at d1 are evaluated once and shared by all three results.
+    """
+    sqrtT = sqrt(T)
+    sigma_sqrtT = sigma * sqrtT
+    d1 = (log(S / K) + (r + 0.5 * sigma * sigma) * T) / sigma_sqrtT
+    d2 = d1 - sigma_sqrtT
+    sign = 1.0 if is_call else -1.0
+
+    # The density is symmetric, so n(d1) is also the density at sign * d1
+    n_d1 = RSQRT2PI * exp(-0.5 * d1 * d1)
+    N_d1 = _cnd_from_pdf(sign * d1, n_d1)
+
+    value = sign * (S * N_d1 - K * exp(-r * T) * _cnd(sign * d2))
+    delta = sign * N_d1
+    vega = S * sqrtT * n_d1
+    return value, delta, vega
+
+
+# Every fastmath flag except 'nnan', which would let LLVM fold away the isnan() checks on the book levels
+@njit(cache=True, fastmath={'ninf', 'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+def compute_quote(S, K, T, r, sigma, is_call, bb, ba):
+    """
+    Numeric core of quoting a single option: returns its Black & Scholes value, the two credit candidates and its
+    delta and vega. <bb>/<ba> are the second best bid/ask prices of the option, NaN when the book is not that deep.
+    """
+    theo, delta, vega = price_value_delta_vega(S, K, T, r, sigma, is_call)
+
+    # A1: credit1 is the distance between theoretical value and strike, credit2 that to the nearest second level
+    credit1 = fabs(theo - K) - 0.1 if theo != K else 0.0
+    if isnan(bb) or isnan(ba):
+        credit2 = 0.0
+    else:
+        credit2 = min(fabs(theo - bb), fabs(theo - ba))
+    return theo, credit1, credit2, delta, vega
+
+
+# Compile the kernels once at start-up rather than inside the first trade loop iteration
+price_value_delta_vega(100.0, 100.0, 1.0, 0.0, 1.0, True)
+compute_quote(100.0, 100.0, 1.0, 0.0, 1.0, True, nan, nan)
+
+
+def pace(min_interval=0.10):
+    """
+    Blocks until at least <min_interval> seconds have passed since the previous call. Only the remaining part of the
+    interval is slept, so time already spent waiting on the exchange counts towards it.
+    """
+    global _next_allowed
+    now = time.monotonic()
+    if now < _next_allowed:
+        time.sleep(_next_allowed - now)
+    _next_allowed = max(now, _next_allowed) + min_interval
+
+
+def round_down_to_tick(price, inv_tick):
+    """
+    Rounds a price down to the nearest tick, given the inverse tick size <inv_tick> (1.0 / tick size), e.g. if the tick
+    size is 0.10, a price of 0.97 will get rounded to 0.90. Scaling by the inverse tick size keeps prices that are on a
+    tick where they are: 0.3 / 0.1 is 2.9999999999999996, which would floor to 0.20, while 0.3 * 10.0 is exactly 3.0.
+    """
+    return floor(price * inv_tick) / inv_tick
+
+
+def round_up_to_tick(price, inv_tick):
+    """
+    Rounds a price up to the nearest tick, given the inverse tick size <inv_tick> (1.0 / tick size), e.g. if the tick
+    size is 0.10, a price of 1.34 will get rounded to 1.40. See round_down_to_tick for why the inverse is used.
+    """
+    return ceil(price * inv_tick) / inv_tick
+
+
+@functools.lru_cache(maxsize=64)
+def _tte(expiry_date, tick):
     """
-    Rounds a price down to the nearest tick, e.g. if the tick size is 0.10, a price of 0.97 will get rounded to 0.90.
+    Memoized calculate_current_time_to_date. Callers pass int(time.monotonic()) as <tick>, so the cached time to expiry
+    is reused within the same second and recomputed once the second rolls over.
     """
-    return floor(price / tick_size) * tick_size
+    return calculate_current_time_to_date(expiry_date)
 
 
-def round_up_to_tick(price, tick_size):
+def fetch_price_books(instrument_ids):
     """
-    Rounds a price up to the nearest tick, e.g. if the tick size is 0.10, a price of 1.34 will get rounded to 1.40.
+    This function requests the last price book of every instrument in <instrument_ids>, returning a dict from
+    instrument id to price book, so that the rest of the trade loop iteration works off one snapshot per instrument.
     """
-    return ceil(price / tick_size) * tick_size
+    return {instrument_id: exchange.get_last_price_book(instrument_id) for instrument_id in instrument_ids}
 
 
-def get_midpoint_value(instrument_id):
+def get_midpoint_value(instrument_id, books):
     """
-    This function calculates the current midpoint of the order book supplied by the exchange for the instrument
-    specified by <instrument_id>, returning None if either side or both sides do not have any orders available.
+    This function calculates the current midpoint of the order book in <books> for the instrument specified by
+    <instrument_id>, returning None if either side or both sides do not have any orders available.
     """
-    order_book = exchange.get_last_price_book(instrument_id=instrument_id)
+    order_book = books[instrument_id]
 
     # If the instrument doesn't have prices at all or on either side, we cannot calculate a midpoint and return None
     if not (order_book and order_book.bids and order_book.asks):
         return None
     else:
         midpoint = (order_book.bids[0].price + order_book.asks[0].price) / 2.0
-        print("midpoint:", midpoint)
+        logger.debug("midpoint: %s", midpoint)
         return midpoint
 
 
-def calculate_theoretical_option_value(expiry_date, strike, callput, stock_value, interest_rate, volatility):
+def compute_deltas(stock_value, tte_cache, interest_rate=0.0, volatility=3.0):
+    """
+    This function calculates the Black & Scholes delta of every option in OPTIONS in one vectorized pass. For a single
+    <stock_value> it returns an array ordered like OPTIONS, for an array of stock values one row per option with the
+    deltas at each of those values. This is the one delta implementation behind option['delta'], max_delta and the
+    delta lookup tables, so that those stay consistent with each other.
+
+    stock_value:             -  Assumed stock value(s) when calculating the Black-Scholes deltas
+    tte_cache: dict          -  Time to expiry per expiry date, computed once per trade loop iteration
+    interest_rate:           -  Assumed interest rate when calculating the Black-Scholes deltas
+    volatility:              -  Assumed volatility of when calculating the Black-Scholes deltas
     """
-    This function calculates the current fair call or put value based on Black & Scholes assumptions.
+    S = np.asarray(stock_value, dtype=np.float64)
+    # Options run along the first axis, the stock values (if more than one) along the second
+    shape = (len(OPTIONS),) + (1,) * S.ndim
+    K = STRIKES.reshape(shape)
+    T = np.array([tte_cache[expiry_date] for expiry_date in EXPIRIES], dtype=np.float64).reshape(shape)
 
-    expiry_date: dt.date     -  Expiry date of the option
-    strike: float            -  Strike price of the option
-    callput: str             -  String 'call' or 'put' detailing what type of option this is
-    stock_value:             -  Assumed stock value when calculating the Black-Scholes value
-    interest_rate:           -  Assumed interest rate when calculating the Black-Scholes value
-    volatility:              -  Assumed volatility of when calculating the Black-Scholes value
+    # log(0) is -inf for a stock value of 0, which ndtr maps to the S -> 0 limit of the delta
+    with np.errstate(divide='ignore'):
+        d1 = (np.log(S / K) + (interest_rate + 0.5 * volatility * volatility) * T) / (volatility * np.sqrt(T))
+    return ndtr(d1) - (~IS_CALL).reshape(shape)
+
+
+def refresh_delta_lut(tte_cache, interest_rate=0.0, volatility=3.0):
     """
-    time_to_expiry = calculate_current_time_to_date(expiry_date)
+    This function (re)builds the delta lookup table used by lookup_delta when the current one is older than
+    DELTA_LUT_REFRESH seconds, so that time decay is absorbed roughly once a minute.
 
-    if callput == 'call':
-        option_value = call_value(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-    elif callput == 'put':
-        option_value = put_value(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-    else:
-        raise Exception(f"""Got unexpected value for callput argument, should be 'call' or 'put' but was {callput}.""")
+    tte_cache: dict          -  Time to expiry per expiry date, computed once per trade loop iteration
+    interest_rate:           -  Assumed interest rate when calculating the Black-Scholes deltas
+    volatility:              -  Assumed volatility of when calculating the Black-Scholes deltas
+    """
+    global _delta_lut, _delta_lut_built_at
+    now = time.monotonic()
+    if _delta_lut is not None and now - _delta_lut_built_at < DELTA_LUT_REFRESH:
+        return
 
-    return option_value
+    stock_values = np.linspace(0.0, DELTA_LUT_MAX_STOCK, DELTA_LUT_SIZE + 1)
+    _delta_lut = compute_deltas(stock_values, tte_cache, interest_rate, volatility)
+    _delta_lut_built_at = now
 
 
-def calculate_option_delta(expiry_date, strike, callput, stock_value, interest_rate, volatility):
+def lookup_delta(i, stock_value):
+    """
+    This function linearly interpolates the delta of the option at index <i> of OPTIONS from the lookup table, returning
+    None when <stock_value> falls outside of the range covered by the table.
     """
-    This function calculates the current option delta based on Black & Scholes assumptions.
+    x = stock_value * (DELTA_LUT_SIZE / DELTA_LUT_MAX_STOCK)
+    idx = int(x)
+    if not 0 <= idx < DELTA_LUT_SIZE:
+        return None
+    frac = x - idx
+    lut = _delta_lut[i]
+    return lut[idx] + (lut[idx + 1] - lut[idx]) * frac
+
 
-    expiry_date: dt.date     -  Expiry date of the option
-    strike: float            -  Strike price of the option
-    callput: str             -  String 'call' or 'put' detailing what type of option this is
-    stock_value:             -  Assumed stock value when calculating the Black-Scholes value
-    interest_rate:           -  Assumed interest rate when calculating the Black-Scholes value
-    volatility:              -  Assumed volatility of when calculating the Black-Scholes value
+def _remember_order(orders, reply, side, volume, price):
     """
-    time_to_expiry = calculate_current_time_to_date(expiry_date)
+    Records a successfully inserted order in <orders>, returning whether the insert succeeded.
+    """
+    if not reply.success:
+        return False
+    orders[reply.order_id] = QuotedOrder(side, volume, price)
+    return True
 
-    if callput == 'call':
-        option_value = call_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-    elif callput == 'put':
-        option_value = put_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-    else:
-        raise Exception(f"""Got unexpected value for callput argument, should be 'call' or 'put' but was {callput}.""")
 
-    return option_value
+def record_fills(option_id, trades):
+    """
+    Takes the volume of our <trades> in <option_id> off the matching orders in <outstanding>, dropping orders that have
+    been filled completely, so that the cached volumes match what is still in the book.
+    """
+    orders = outstanding.get(option_id)
+    if not orders:
+        return
+    for trade in trades:
+        order = orders.get(trade.order_id)
+        if order is None:
+            continue
+        remaining = order.volume - trade.volume
+        if remaining > 0:
+            orders[trade.order_id] = order._replace(volume=remaining)
+        else:
+            del orders[trade.order_id]
 
 
-def update_quotes(callput, option_id, theoretical_price, credit, volume, position_limit, tick_size):
+def update_quotes(callput, option_id, theoretical_price, credit, volume, position_limit, tick_size, positions, book):
     """
     This function updates the quotes specified by <option_id>. We take the following actions in sequence:
-        - pull (remove) any current oustanding orders
+        - look up any current oustanding orders
         - add credit to theoretical price and round to nearest tick size to create a set of bid/ask quotes
         - calculate max volumes to insert as to not pass the position_limit
-        - reinsert limit orders on those levels
+        - pull (remove) the outstanding orders and reinsert limit orders on those levels
 
     Arguments:
         option_id: str           -  Exchange Instrument ID of the option to trade
@@ -130,27 +295,31 @@ def update_quotes(callput, option_id, theoretical_price, credit, volume, positio
         volume:                  -  Volume (# lots) of the inserted orders (given they do not breach position limits)
         position_limit: int      -  Position limit (long/short) to avoid crossing
         tick_size: float         -  Tick size of the quoted instrument
+        positions: dict          -  Snapshot of exchange.get_positions() taken at the start of the trade loop iteration
+        book: PriceBook          -  Price book of <option_id>, requested right before the option was priced
     """
 
-    # Print any new trades
+    # Log any new trades
     
         
     trades = exchange.poll_new_trades(instrument_id=option_id)
     for trade in trades:
-        print(f'- Last period, traded {trade.volume} lots in {option_id} at price {trade.price:.2f}, side: {trade.side}.')
-
-    # Pull (remove) all existing outstanding orders
-    orders = exchange.get_outstanding_orders(instrument_id=option_id)
+        logger.debug('- Last period, traded %s lots in %s at price %.2f, side: %s.', trade.volume, option_id, trade.price,
+                     trade.side)
+    record_fills(option_id, trades)
+
+    # Look up all existing outstanding orders, they are pulled right before the new ones are inserted
+    orders = outstanding.pop(option_id, None)
+    if orders is None:
+        orders = exchange.get_outstanding_orders(instrument_id=option_id)
     
     old_bid_volume = 0
     old_ask_volume = 0
     for order_id, order in orders.items():
-        print(f'- Deleting old {order.side} order in {option_id} for {order.volume} @ {order.price:8.2f}.')
         if order.side == 'ask':
             old_ask_volume = order.volume
         elif order.side == 'bid':
             old_bid_volume = order.volume
-        exchange.delete_order(instrument_id=option_id, order_id=order_id)
     
     if old_bid_volume > 20:
         old_bid_volume = 20
@@ -158,18 +327,22 @@ def update_quotes(callput, option_id, theoretical_price, credit, volume, positio
         old_ask_volume = 20
 
     # Calculate bid and ask price
-    bid_price = round_down_to_tick(theoretical_price - credit, tick_size)
-    ask_price = round_up_to_tick(theoretical_price + credit, tick_size)
+    inv_tick = 1.0 / tick_size
+    bid_price = round_down_to_tick(theoretical_price - credit, inv_tick)
+    ask_price = round_up_to_tick(theoretical_price + credit, inv_tick)
     
-    book = exchange.get_last_price_book(option_id)
     if not book.bids or not book.asks:
-        bid_price = bid_price
-        ask_price = ask_price
+        # Nothing to fall back on, so a bid/ask collision is resolved by widening one side by a tick. The parity of the
+        # theoretical price in ticks picks the side: a deterministic parity tiebreak that splits roughly 50/50, no RNG.
+        collided = round(bid_price, 1) == round(ask_price, 1)
+        widen_bid = collided and (int(theoretical_price * inv_tick) & 1) == 0
+        bid_price -= tick_size * widen_bid
+        ask_price += tick_size * (collided and not widen_bid)
     else:
         best_bid = round(float(book.bids[0].price),1)
-        print("best_bid: ", best_bid)
+        logger.debug("best_bid: %s", best_bid)
         best_ask = round(float(book.asks[0].price),1)
-        print("best_ask: ", best_ask)
+        logger.debug("best_ask: %s", best_ask)
         if best_bid > bid_price or bid_price > ask_price:
             if best_bid + 0.1 < best_ask - 0.1:
                 bid_price = best_bid + 0.1
@@ -190,7 +363,7 @@ def update_quotes(callput, option_id, theoretical_price, credit, volume, positio
                 bid_price = best_bid - 0.1
                 ask_price = best_ask + 0.1
     # Calculate bid and ask volumes, taking into account the provided position_limit
-    position = exchange.get_positions()[option_id]
+    position = positions[option_id]
     
     if position > position_limit*0.5 or position < -position_limit*0.5:
         if position > 0:
@@ -207,116 +380,98 @@ def update_quotes(callput, option_id, theoretical_price, credit, volume, positio
     bid_volume = min(volume+old_bid_volume, max_volume_to_buy)
     ask_volume = min(volume+old_ask_volume, max_volume_to_sell)
     
-    # Insert new limit orders
-    if callput == "call":
-        if bid_volume > 0 and not trade_would_breach_position_limit(option_id, volume, 'bid',position_limit = position_limit) and not force_delta_decrease:
-            
-            print(f'- Inserting bid limit order in {option_id} for {bid_volume} @ {bid_price:8.2f}.')
-            exchange.insert_order(instrument_id=option_id, 
-                                  price=bid_price, 
-                                  volume=bid_volume, 
-                                  side='bid', 
-                                  order_type='limit', 
-                                  )
-            
-        if ask_volume > 0 and not trade_would_breach_position_limit(option_id, volume, 'ask',position_limit = position_limit) and not force_delta_increase:
-            
-            print(f'- Inserting ask limit order in {option_id} for {ask_volume} @ {ask_price:8.2f}.')
-            exchange.insert_order(instrument_id=option_id, 
-                                  price=ask_price, 
-                                  volume=ask_volume, 
-                                  side='ask', 
-                                  order_type='limit', 
-                                  )
-            
-    elif callput == "put":
+    # Keep option updates at least 1/10th of a second apart to avoid breaching the exchange frequency limit
+    pace(0.10)
+
+    # Pull (remove) all existing outstanding orders. An order that could not be deleted may still be in the book, in
+    # which case nothing is cached and the next update asks the exchange again.
+    all_deleted = True
+    for order_id, order in orders.items():
+        logger.debug('- Deleting old %s order in %s for %s @ %8.2f.', order.side, option_id, order.volume,
+                     order.price)
+        all_deleted &= exchange.delete_order(instrument_id=option_id, order_id=order_id).success
+
+    # Insert new limit orders. A bought call or a sold put adds delta, so those are held back while deltas have to
+    # decrease, and the opposite sides while deltas have to increase.
+    inserted = {}
+    all_inserted = True
+    bid_blocked_by = FORCE_DELTA_DECREASE if callput == "call" else FORCE_DELTA_INCREASE
+    ask_blocked_by = FORCE_DELTA_INCREASE if callput == "call" else FORCE_DELTA_DECREASE
+
+    if bid_volume > 0 and position + bid_volume <= position_limit and not FORCE_FLAGS & bid_blocked_by:
         
-        if bid_volume > 0 and not trade_would_breach_position_limit(option_id, volume, 'bid',position_limit = position_limit) and not force_delta_increase:
-            
-            print(f'- Inserting bid limit order in {option_id} for {bid_volume} @ {bid_price:8.2f}.')
-            exchange.insert_order(instrument_id=option_id, 
-                                  price=bid_price, 
-                                  volume=bid_volume, 
-                                  side='bid', 
-                                  order_type='limit', 
-                                  )
-            
-        if ask_volume > 0 and not trade_would_breach_position_limit(option_id, volume, 'ask',position_limit = position_limit) and not force_delta_decrease:
-            
-            print(f'- Inserting ask limit order in {option_id} for {ask_volume} @ {ask_price:8.2f}.')
-            exchange.insert_order(instrument_id=option_id, 
-                                  price=ask_price, 
-                                  volume=ask_volume, 
-                                  side='ask', 
-                                  order_type='limit', 
-                                  )
+        logger.debug('- Inserting bid limit order in %s for %s @ %8.2f.', option_id, bid_volume, bid_price)
+        reply = exchange.insert_order(instrument_id=option_id, 
+                                      price=bid_price, 
+                                      volume=bid_volume, 
+                                      side='bid', 
+                                      order_type='limit', 
+                                      )
+        all_inserted &= _remember_order(inserted, reply, 'bid', bid_volume, bid_price)
+        
+    if ask_volume > 0 and position - ask_volume >= -position_limit and not FORCE_FLAGS & ask_blocked_by:
+        
+        logger.debug('- Inserting ask limit order in %s for %s @ %8.2f.', option_id, ask_volume, ask_price)
+        reply = exchange.insert_order(instrument_id=option_id, 
+                                      price=ask_price, 
+                                      volume=ask_volume, 
+                                      side='ask', 
+                                      order_type='limit', 
+                                      )
+        all_inserted &= _remember_order(inserted, reply, 'ask', ask_volume, ask_price)
 
+    if all_deleted and all_inserted:
+        outstanding[option_id] = inserted
 
-def hedge_delta_position(stock_id, options, stock_value):
+
+def hedge_delta_position(stock_id, stock_value, positions, tte_cache, book):
     """
     This function (once finished) hedges the outstanding delta position by trading in the stock.
 
     That is:
         - It calculates how sensitive the total position value is to changes in the underlying by summing up all
-          individual delta component.
+          individual delta component of the options in OPTIONS (static fields taken from IDS/STRIKES/IS_CALL/EXPIRIES).
         - And then trades stocks which have the opposite exposure, to remain, roughly, flat delta exposure
 
     Arguments:
         stock_id: str         -  Exchange Instrument ID of the stock to hedge with
-        options: List[dict]   -  List of options with details to calculate and sum up delta positions for
         stock_value: float    -  The stock value to assume when making delta calculations using Black-Scholes
+        positions: dict       -  Result of exchange.get_positions(), requested right before hedging
+        tte_cache: dict       -  Time to expiry per expiry date, computed once per trade loop iteration
+        book: PriceBook       -  Price book of <stock_id>, requested right before hedging
     """
 
     # A3: Calculate the delta position here
-    positions = exchange.get_positions()
     
     total_delta_position = 0
-    book = exchange.get_last_price_book(stock_id)
     if not book.bids or not book.asks:
         return
     else:
         best_bid = float(book.bids[0].price)
         best_ask = float(book.asks[0].price)
         
-    for option in options:
-      if option['callput'] == 'put':
-        position = positions[option['id']]
-        print(f"- The current position in the option {option} is {position}.")
-        option_delta = calculate_option_delta(expiry_date=option['expiry_date'],
-                                                strike = option['strike'], 
-                                                callput = option['callput'], 
-                                                stock_value=best_ask, 
-                                                interest_rate = 0.0, 
-                                                volatility = 3.0)
-      elif option['callput'] == 'call':
-        position = positions[option['id']]
-        print(f"- The current position in the option {option} is {position}.")
-        option_delta = calculate_option_delta(expiry_date=option['expiry_date'],
-                                              strike = option['strike'], 
-                                              callput = option['callput'], 
-                                              stock_value=best_bid, 
-                                              interest_rate = 0.0, 
-                                              volatility = 3.0)
+    for i, option_id in enumerate(IDS):
+      position = positions[option_id]
+      logger.debug("- The current position in the option %s is %s.", option_id, position)
+      is_call = IS_CALL[i]
+      # Calls are valued at the stock bid, puts at the stock ask
+      hedge_stock_value = best_bid if is_call else best_ask
+      option_delta = lookup_delta(i, hedge_stock_value)
+      if option_delta is None:
+        # Off the table, fall back to the Numba kernel, whose delta is within about 1e-7 of compute_deltas
+        _, option_delta, _ = price_value_delta_vega(hedge_stock_value, STRIKES[i], tte_cache[EXPIRIES[i]], 0.0, 3.0,
+                                                    is_call)
       
       delta_position = option_delta * position
       
       total_delta_position += delta_position
         
-    print(f'- The current delta position in the stock {stock_id} is {total_delta_position}.')
+    logger.debug('- The current delta position in the stock %s is %s.', stock_id, total_delta_position)
     stock_position = positions[stock_id]
-    print(f'- The current position in the stock {stock_id} is {stock_position}.')
+    logger.debug('- The current position in the stock %s is %s.', stock_id, stock_position)
 
     # A4: Implement the delta hedge here, staying mindful of the overall position-limit of 100, also for the stocks.
     
-    book = exchange.get_last_price_book(stock_id)
-    if not book.bids or not book.asks:
-        return
-    else:
-        best_bid = float(book.bids[0].price)
-        best_ask = float(book.asks[0].price)
-    
-    
-    
     volume = int(round(total_delta_position,0)) + stock_position
     
     delta_pos = float(total_delta_position)
@@ -336,14 +491,16 @@ def hedge_delta_position(stock_id, options, stock_value):
         side = 'bid'
         hedge_price = best_ask
     
-    print("delta_pos: ", delta_pos)
-    print("stock_position: ", stock_position)
-    print("net_delta: ", (delta_pos + stock_position))
+    logger.debug("delta_pos: %s", delta_pos)
+    logger.debug("stock_position: %s", stock_position)
+    logger.debug("net_delta: %s", delta_pos + stock_position)
     
-    if delta_pos + stock_position > 15 or delta_pos + stock_position < -15 or force_delta_decrease or force_delta_increase:
+    if delta_pos + stock_position > 15 or delta_pos + stock_position < -15 or FORCE_FLAGS:
         
-        if not trade_would_breach_position_limit(stock_id, volume, side) and volume != 0:
-            print(f'''Inserting IOC {side} for {stock_id}: {volume:.0f} lot(s) at price {hedge_price:.2f}.''')
+        if not trade_would_breach_position_limit(stock_id, volume, side, positions) and volume != 0:
+            logger.debug('Inserting IOC %s for %s: %.0f lot(s) at price %.2f.', side, stock_id, volume, hedge_price)
+            # Keep the hedge at least 1/10th of a second after the last option update to respect the frequency limit
+            pace(0.10)
             exchange.insert_order(
                 instrument_id=stock_id,
                 price=hedge_price,
@@ -351,28 +508,19 @@ def hedge_delta_position(stock_id, options, stock_value):
                 side=side,
                 order_type='ioc')
         else:
-            print("- Not hedging.")
+            logger.debug("- Not hedging.")
             
     else:
-        print(f'- Not hedging.')
+        logger.debug('- Not hedging.')
     return (delta_pos + stock_position)
     
     
-def options_delta_calc(options_list):
-    delta_sum = 0
-    for option in options_list:
-        time_to_expiry = calculate_current_time_to_date(option['expiry_date'])
-        strike = option['strike']
-        interest_rate = 0.0
-        volatility = 3.0
-        if option['callput'] == 'call':
-            option_delta = call_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-        elif option['callput'] == 'put':
-            option_delta = put_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
+def options_delta_calc(stock_value, tte_cache):
+    option_deltas = compute_deltas(stock_value, tte_cache)
+    for option, option_delta in zip(OPTIONS, option_deltas):
         option['delta'] = option_delta
-        delta_sum += option_delta
         
-    delta_sum = round(delta_sum,2)    
+    delta_sum = round(float(option_deltas.sum()),2)    
     
     if delta_sum < 0:
         delta_sum += 0.8
@@ -385,46 +533,135 @@ def options_delta_calc(options_list):
         return 'negative', delta_sum
 
 
+def process_option(i, stock_value, positions, tte_cache, max_delta):
+    """
+    This function runs the quoting cycle of the option at index <i> of OPTIONS: it records new trades, prices the
+    option and updates its quotes. The price book of the option is requested right before pricing, so that it is not
+    held up by the paced updates of the options before it. Besides the exchange orders, it updates the last traded
+    prices in OPTIONS_ARR and the cached orders of the option in <outstanding>.
+
+    Arguments:
+        i: int                -  Index of the option in OPTIONS
+        stock_value: float    -  The stock value to assume when pricing the option
+        positions: dict       -  Snapshot of exchange.get_positions() taken at the start of the trade loop iteration
+        tte_cache: dict       -  Time to expiry per expiry date, computed once per trade loop iteration
+        max_delta: float      -  Largest absolute option delta, used to scale the credit
+    """
+    option = OPTIONS[i]
+    option_id = IDS[i]
+    strike = OPTIONS_ARR['strike'][i]
+    is_call = OPTIONS_ARR['is_call'][i]
+    callput = 'call' if is_call else 'put'
+    
+    trades = exchange.poll_new_trades(option_id)
+    for t in trades:
+        logger.debug("[TRADED %s] price(%s), volume(%s), side(%s)", t.instrument_id, t.price, t.volume, t.side)
+        if t.side == 'bid':
+            OPTIONS_ARR['last_bid'][i] = t.price
+        elif t.side == 'ask':
+            OPTIONS_ARR['last_ask'][i] = t.price
+    record_fills(option_id, trades)
+    
+    logger.debug("Updating instrument %s", option_id)
+    
+    option_limit = option['position_limit']
+
+    # A1: Here we ask a fixed credit of 15cts, regardless of what the market circumstances are or which option
+    #  we're quoting. That can be improved. Can you think of something better?
+    book = exchange.get_last_price_book(option_id)
+    if len(book.bids)<2 or len(book.asks)<2:
+        second_bid = second_ask = nan
+    else:
+        second_bid = float(book.bids[1].price)
+        second_ask = float(book.asks[1].price)
+    
+    theoretical_value, credit1, credit2, _, _ = compute_quote(
+        stock_value, strike, tte_cache[EXPIRIES[i]], 0.0, 3.0, is_call, second_bid, second_ask)
+    
+    credit = credit1 if credit1 < credit2 else credit2
+    
+    # option['delta'] comes from compute_deltas like max_delta does, so this stays within [0, 1]; the delta of the
+    # compute_quote kernel uses a polynomial approximation of the normal distribution and differs slightly
+    delta_multiplier = option['delta']/max_delta
+    
+    if delta_multiplier < 0:
+        delta_multiplier = -delta_multiplier
+    
+    credit = credit*0.4 + 0.6*credit*delta_multiplier
+    # A5: Here we are inserting a volume of 3, only taking into account the position limit of 100, are there better
+    #  choices?
+    logger.debug("%s limit is %s.", option_id, option_limit)
+    update_quotes(callput=callput,
+                  option_id=option_id,
+                  theoretical_price=theoretical_value,
+                  credit=credit,
+                  volume=20,
+                  position_limit=option_limit,
+                  tick_size=0.10,
+                  positions=positions,
+                  book=book)
+
+
 # A2: Not all the options have been entered here yet, include all of them for an easy improvement
 bid_count = 0
 
 STOCK_ID = 'BMW'
 OPTIONS = [
-    {'id': 'BMW-2021_12_10-050C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  50, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2021_12_10-050P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  50, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-050C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  50, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-050P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  50, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2021_12_10-075C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  75, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2021_12_10-075P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  75, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-075C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  75, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-075P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  75, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2021_12_10-100C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike': 100, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2021_12_10-100P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike': 100, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-100C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike': 100, 'callput': 'call', 'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
-    {'id': 'BMW-2022_01_14-100P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike': 100, 'callput': 'put',  'last_ask': 0.0, 'last_bid': 0.0, 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-050C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  50, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-050P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  50, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-050C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  50, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-050P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  50, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-075C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  75, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-075P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike':  75, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-075C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  75, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-075P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike':  75, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-100C', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike': 100, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2021_12_10-100P', 'expiry_date': dt.datetime(2021, 12, 10, 12, 0, 0), 'strike': 100, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-100C', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike': 100, 'callput': 'call', 'delta': 0.0, 'position_limit': 100},
+    {'id': 'BMW-2022_01_14-100P', 'expiry_date': dt.datetime(2022,  1, 14, 12, 0, 0), 'strike': 100, 'callput': 'put',  'delta': 0.0, 'position_limit': 100},
 ]
 
+# Typed per-option fields, including the last traded prices which the trade loop updates in place. The static fields
+# of the OPTIONS literal are only read here; past this point they are taken from OPTIONS_ARR/STRIKES/IS_CALL/IDS/
+# EXPIRIES, while the dicts are used for the mutable 'delta' and 'position_limit'.
+OPTION_DTYPE = np.dtype([('id', 'U24'), ('strike', 'f8'), ('is_call', '?'), ('last_ask', 'f8'), ('last_bid', 'f8')])
+OPTIONS_ARR = np.zeros(len(OPTIONS), dtype=OPTION_DTYPE)
+OPTIONS_ARR['id'] = [o['id'] for o in OPTIONS]
+OPTIONS_ARR['strike'] = [o['strike'] for o in OPTIONS]
+OPTIONS_ARR['is_call'] = [o['callput'] == 'call' for o in OPTIONS]
+
+STRIKES = OPTIONS_ARR['strike']
+IS_CALL = OPTIONS_ARR['is_call']
+IDS = OPTIONS_ARR['id'].tolist()
+EXPIRIES = [o['expiry_date'] for o in OPTIONS]
 
-for option in OPTIONS:
-    book = exchange.get_last_price_book(option['id'])
+
+books = fetch_price_books(IDS)
+for i in range(len(OPTIONS)):
+    book = books[IDS[i]]
     if not book.bids or not book.asks:
         continue
     else:
         best_bid = float(book.bids[0].price)
         best_ask = float(book.asks[0].price)
         
-    option['last_ask'] = best_ask
-    option['last_bid'] = best_bid
+    OPTIONS_ARR['last_ask'][i] = best_ask
+    OPTIONS_ARR['last_bid'][i] = best_bid
         
 while True:
-    print(f'')
-    print(f'-----------------------------------------------------------------')
-    print(f'TRADE LOOP ITERATION ENTERED AT {str(dt.datetime.now()):18s} UTC.')
-    print(f'-----------------------------------------------------------------')
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('\n-----------------------------------------------------------------\n'
+                     'TRADE LOOP ITERATION ENTERED AT %-18s UTC.\n'
+                     '-----------------------------------------------------------------', str(dt.datetime.now()))
 
-    stock_value = get_midpoint_value(STOCK_ID)
+    books = fetch_price_books([STOCK_ID])
+    stock_value = get_midpoint_value(STOCK_ID, books)
+    positions = exchange.get_positions()
+    tick = int(time.monotonic())
+    tte_cache = {expiry_date: _tte(expiry_date, tick) for expiry_date in set(EXPIRIES)}
+    refresh_delta_lut(tte_cache)
     
-    delta_sign, delta_sum = options_delta_calc(OPTIONS)
+    delta_sign, delta_sum = options_delta_calc(stock_value, tte_cache)
     
     if delta_sign == 'positive':
         delta_position_change = int(round(delta_sum/6,0)*100)
@@ -440,14 +677,10 @@ while True:
                 delta_sum -= delta_position_change
     
     if stock_value is None:
-        print('Empty stock order book on bid or ask-side, or both, unable to update option prices.')
+        logger.warning('Empty stock order book on bid or ask-side, or both, unable to update option prices.')
         time.sleep(4)
         continue
     
-    book_BMW = exchange.get_last_price_book(STOCK_ID)
-    best_ask_BMW = round(float(book_BMW.asks[0].price),1)
-    best_bid_BMW = round(float(book_BMW.bid[0].price),1)
-    
     max_delta = 0.0
     for option in OPTIONS:
         if option['delta'] < 0:
@@ -457,134 +690,20 @@ while True:
             if option['delta'] > max_delta:
                 max_delta = option['delta']
     
-    for option in OPTIONS:
-        
-        trades = exchange.poll_new_trades(option['id'])
-        a_list = []
-        for t in trades:
-            print(f"[TRADED {t.instrument_id}] price({t.price}), volume({t.volume}), side({t.side})")
-            a_list.append([t.instrument_id, t.price, t.volume, str(t.side)])
-        
-        print(a_list)
-        for item in a_list:
-            side = item[3]
-            if side == 'bid':
-                last_bid = item[1]
-                option['last_bid'] = last_bid
-            elif side == 'ask':
-                last_ask = item[1]
-                option['last_ask'] = last_ask
-        
-        print(f"\nUpdating instrument {option['id']}")
-        
-        expiry_date = option['expiry_date']
-        strike = option['strike']
-        callput = option['callput']
-        interest_rate = 0.0
-        volatility = 3.0
-        option_limit = option['position_limit']
-        
-        
-
-        theoretical_value = calculate_theoretical_option_value(expiry_date=expiry_date,
-                                                               strike=strike,
-                                                               callput=callput,
-                                                               stock_value=stock_value,
-                                                               interest_rate=interest_rate,
-                                                               volatility=volatility)
-
-        # A1: Here we ask a fixed credit of 15cts, regardless of what the market circumstances are or which option
-        #  we're quoting. That can be improved. Can you think of something better?
-        time_to_expiry = calculate_current_time_to_date(expiry_date)
-        if callput == 'call':
-            option_delta = call_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-            option_vega = call_vega(S=stock_value, K=strike, T=time_to_expiry, r = interest_rate, sigma = volatility)
-        elif callput == 'put':
-            option_delta = put_delta(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-            option_vega = put_vega(S=stock_value, K=strike, T=time_to_expiry, r=interest_rate, sigma=volatility)
-        else:
-            raise Exception(f"""Got unexpected value for callput argument, should be 'call' or 'put' but was {callput}.""")
-        
-        if theoretical_value > option['strike']:
-            credit1 = theoretical_value - option['strike'] - 0.1
-        elif theoretical_value < option['strike']:
-            credit1 = option['strike'] - theoretical_value - 0.1
-        else:
-            credit1 = 0
-        
-        book = exchange.get_last_price_book(option['id'])
-        if len(book.bids)<2 or len(book.asks)<2:
-            credit2 = 0
-        else:
-            best_bid = float(book.bids[1].price)
-            best_ask = float(book.asks[1].price)
-            best_bid_vol = int(book.bids[1].volume)
-            best_ask_vol = int(book.asks[1].volume)
-            
-            if theoretical_value > best_bid:
-                diff_bid = theoretical_value - best_bid
-            else:
-                diff_bid = best_bid - theoretical_value
-                
-            if theoretical_value < best_ask:
-                diff_ask = best_ask - theoretical_value
-            else:
-                diff_ask = theoretical_value - best_ask
-            
-            if diff_bid < diff_ask:
-                credit2 = diff_bid
-            else:
-                credit2 = diff_ask
-        
-        positions = exchange.get_positions()
-        position = positions[option['id']]
-        
-        
-        
-        if credit1 > credit2:
-            credit = credit2
-        elif credit1 < credit2:
-            credit = credit1     
-        
-        
-        delta_multiplier = option_delta/max_delta
-        
-        if delta_multiplier < 0:
-            delta_multiplier = -delta_multiplier
-        
-        credit = credit*0.4 + 0.6*credit*delta_multiplier
-        # A5: Here we are inserting a volume of 3, only taking into account the position limit of 100, are there better
-        #  choices?
-        print(f"{option['id']} limit is {option_limit}.")
-        update_quotes(callput=option['callput'],
-                      option_id=option['id'],
-                      theoretical_price=theoretical_value,
-                      credit=credit,
-                      volume=20,
-                      position_limit=option_limit,
-                      tick_size=0.10)
-
-        # Wait 1/10th of a second to avoid breaching the exchange frequency limit
-        time.sleep(0.10)
+    for i in range(len(OPTIONS)):
+        process_option(i, stock_value, positions, tte_cache, max_delta)
     
 
-    print(f'\nHedging delta position')
+    logger.debug('Hedging delta position')
     
-    net_delta = hedge_delta_position(STOCK_ID, OPTIONS, stock_value)
+    # The option updates take over a second, so the hedge works off fresh positions and a fresh stock book rather than
+    # the snapshots, which would miss any option fills from this iteration
+    positions = exchange.get_positions()
+    net_delta = hedge_delta_position(STOCK_ID, stock_value, positions, tte_cache, exchange.get_last_price_book(STOCK_ID))
     stock_position = positions[STOCK_ID]
-    print(stock_position)
-    if stock_position >= 80:
-        print("force_delta_increase = True")
-        force_delta_increase = True
-    elif stock_position <= 80:
-        print("force_delta_decrease = False confirmed.")
-        force_delta_decrease = False
-    if stock_position <= -80:
-        print("force_delta_decrease = True")
-        force_delta_decrease = True
-    elif stock_position >= -80:
-        print("force_delta_increase = False confirmed.")
-        force_delta_increase = False
-    
-    print(f'Sleeping for 2 seconds.')
+    logger.debug('stock_position: %s', stock_position)
+    FORCE_FLAGS = (FORCE_DELTA_INCREASE if stock_position >= 80 else 0) | (FORCE_DELTA_DECREASE if stock_position <= -80 else 0)
+    logger.debug('FORCE_FLAGS = %s', FORCE_FLAGS)
+    
+    logger.debug('Sleeping for 2 seconds.')
     time.sleep(2)